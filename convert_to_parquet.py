@@ -0,0 +1,43 @@
+"""CSVデータをParquet形式に変換する（初回のみ実行）
+
+使い方: python convert_to_parquet.py
+
+ダッシュボードと同じ読み込み・クリーニング処理（data_io.py）を通したデータを、
+各CSVと同じ場所に .parquet として保存します。
+ダッシュボードは .parquet があればCSVより優先して読み込みます。
+"""
+from data_io import (
+    AGE_PATH_TEMPLATE,
+    AGE_YEARS,
+    POPULATION_PATH,
+    clean_population_data,
+    parquet_path,
+    read_age_csv,
+    read_population_csv,
+)
+
+
+def convert(df, csv_path):
+    """DataFrameをParquetファイルとして保存"""
+    path = parquet_path(csv_path)
+    df.to_parquet(path, engine='pyarrow', compression='zstd')
+    print(f"✅ {csv_path} -> {path}")
+
+
+def main():
+    """メイン関数"""
+    try:
+        convert(clean_population_data(read_population_csv(POPULATION_PATH)), POPULATION_PATH)
+    except FileNotFoundError:
+        print(f"⚠️ 人口動態データファイルが見つかりません: {POPULATION_PATH}")
+    
+    for year in AGE_YEARS:
+        csv_path = AGE_PATH_TEMPLATE.format(year=year)
+        try:
+            convert(read_age_csv(csv_path), csv_path)
+        except FileNotFoundError:
+            print(f"⚠️ {year}年の年齢別データファイルが見つかりません: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
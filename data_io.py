@@ -0,0 +1,110 @@
+"""人口データの読み込み処理（Streamlitに依存しない）
+
+report.py（ダッシュボード）と convert_to_parquet.py（変換スクリプト）の
+両方から利用します。
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# データファイルのパス
+POPULATION_PATH = "人口動態/population_included/2024_population.csv"
+AGE_PATH_TEMPLATE = "人口動態/prefecture_population_age/{year}_population_age.csv"
+AGE_YEARS = [2022, 2023, 2024]
+
+
+def parquet_path(csv_path):
+    """CSVファイルに対応するParquetファイルのパス"""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+# 人口動態データの列定義
+_POP_COLS = ('団体コード', '都道府県名', '男性人口', '女性人口', '総人口', '世帯数',
+             '転入国内', '転入国外', '転入計', '出生数', 'その他増', '増加計',
+             '転出国内', '転出国外', '転出計', '死亡数', 'その他減', '減少計',
+             '人口増減数', '人口増減率', '自然増減数', '自然増減率', '社会増減数', '社会増減率')
+_NUM_COLS = frozenset(('男性人口', '女性人口', '総人口', '世帯数', '出生数', '死亡数',
+                       '人口増減数', '人口増減率', '自然増減数', '自然増減率',
+                       '社会増減数', '社会増減率'))
+# ダッシュボードで使用する列のみ読み込む
+_POP_USECOLS = frozenset(('団体コード', '都道府県名')) | _NUM_COLS
+
+# 年齢別人口データの列定義（5歳階級 × 21区分）
+_AGE_BINS = tuple(f'{age}歳～{age + 4}歳' for age in range(0, 100, 5)) + ('100歳以上',)
+_AGE_COLS = ('団体コード', '都道府県名', '性別', '総数') + _AGE_BINS
+# 都道府県・性別と年齢階級の列のみ読み込む
+_AGE_USECOLS = frozenset(('都道府県名', '性別') + _AGE_BINS)
+
+# Parquet読み込み時にArrow型のまま保持する型（文字列のみ）
+_ARROW_STRING_TYPES = {pa.string(): pd.ArrowDtype(pa.string()),
+                       pa.large_string(): pd.ArrowDtype(pa.large_string())}
+
+
+def read_population_csv(path):
+    """人口動態CSVの読み込み（桁区切り・欠損値・型はパーサーで処理）
+    
+    文字列列はArrow型で保持する。数値列はArrow型を指定すると桁区切りが
+    解釈されないため、パーサー上はfloat64で読み込む。
+    """
+    return _read_numeric_csv(path, _NUM_COLS, skiprows=5, names=_POP_COLS, usecols=_POP_USECOLS)
+
+
+def read_age_csv(path):
+    """年齢別人口CSVの読み込み"""
+    return _read_numeric_csv(path, _AGE_BINS, skiprows=2, names=_AGE_COLS, usecols=_AGE_USECOLS)
+
+
+def _read_numeric_csv(path, numeric_cols, **kwargs):
+    """数値列をfloat64として読み込む
+    
+    通常はパーサーで直接数値化する。想定外のセル値（'- ' や '***' など）で
+    失敗した場合は文字列として読み直し、カンマ・空白を除去して数値化できない
+    値は欠損値にする。
+    """
+    kwargs.update(encoding='utf-8', header=0, memory_map=True, dtype_backend='pyarrow')
+    try:
+        return pd.read_csv(path, thousands=',',
+                           na_values={col: [' ', '-'] for col in numeric_cols},
+                           dtype={col: 'float64' for col in numeric_cols}, **kwargs)
+    except ValueError:
+        df = pd.read_csv(path, dtype={col: str for col in numeric_cols}, **kwargs)
+        for col in numeric_cols:
+            df[col] = pd.to_numeric(df[col].str.replace(r'[,\s]', '', regex=True),
+                                    errors='coerce').astype('float64')
+        return df
+
+
+def read_table(csv_path, read_csv):
+    """Parquetファイルが最新であれば優先して読み込み、それ以外はCSVを読み込む"""
+    path = parquet_path(csv_path)
+    if not _parquet_is_current(path, csv_path):
+        return read_csv(csv_path)
+    
+    try:
+        # メモリマップで読み込み、CSVと同じ型（文字列はArrow型、数値はfloat64）に変換
+        return pq.read_table(path, memory_map=True).to_pandas(types_mapper=_ARROW_STRING_TYPES.get)
+    except (pa.ArrowInvalid, OSError):
+        # 破損・書き込み途中のParquetはCSVにフォールバック
+        return read_csv(csv_path)
+
+
+def _parquet_is_current(path, csv_path):
+    """ParquetファイルがありCSVより古くない（またはCSVが無い）かどうか"""
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def clean_population_data(df):
+    """人口動態データのクリーニング"""
+    if df is None:
+        return None
+    
+    # 合計行を除外（列名・数値型は読み込み時に設定済み）
+    # ブールマスクでの抽出は新しいDataFrameを返すため .copy() は不要
+    mask = df['都道府県名'].ne('合計').to_numpy(dtype=bool, na_value=True)
+    return df.loc[mask]
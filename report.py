@@ -1,19 +1,35 @@
+import importlib.util
 import streamlit as st
 import pandas as pd
 import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
-# Plotlyのインポートをtry-except文で囲む
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    from plotly.subplots import make_subplots
-    PLOTLY_AVAILABLE = True
-except ImportError as e:
-    st.error(f"Plotlyライブラリが見つかりません: {e}")
+from data_io import (
+    AGE_PATH_TEMPLATE,
+    AGE_YEARS,
+    POPULATION_PATH,
+    clean_population_data,
+    read_age_csv,
+    read_population_csv,
+    read_table,
+)
+
+# Plotlyの有無だけを確認し、インポート自体はチャート作成時まで遅延させる
+PLOTLY_AVAILABLE = importlib.util.find_spec("plotly") is not None
+if not PLOTLY_AVAILABLE:
+    st.error("Plotlyライブラリが見つかりません")
     st.info("以下のコマンドを実行してください: pip install plotly")
-    PLOTLY_AVAILABLE = False
+
+def _get_px():
+    """plotly.expressを使用時にインポート（依存関係の欠落などで失敗した場合はNone）"""
+    try:
+        import plotly.express as px
+    except ImportError as e:
+        st.error(f"Plotlyライブラリが見つかりません: {e}")
+        st.info("以下のコマンドを実行してください: pip install plotly")
+        return None
+    return px
 
 # ページ設定
 st.set_page_config(
@@ -33,11 +49,6 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #A23B72;
-        margin-bottom: 1rem;
-    }
     .metric-card {
         background-color: #f0f2f6;
         padding: 1rem;
@@ -47,30 +58,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+def sub_header(text):
+    """セクション見出し（HTMLを介さずネイティブ要素で描画）"""
+    st.header(text)
+
+# データテーブルに表示する列（ブラウザへ送るデータ量を抑える）
+_DISPLAY_COLS = ['都道府県名', '総人口', '人口増減数', '人口増減率', '自然増減数', '社会増減数', '出生数', '死亡数']
+
 def load_data():
-    """データの読み込みとクリーニング"""
+    """データの読み込み"""
     data_status = {"population": False, "age": {}}
     
     # 人口動態データの読み込み
     population_2024 = None
     try:
-        population_2024 = pd.read_csv("人口動態/population_included/2024_population.csv", 
-                                    encoding='utf-8', skiprows=5)
+        population_2024 = read_table(POPULATION_PATH, read_population_csv)
         data_status["population"] = True
         st.success("✅ 2024年人口動態データを読み込みました")
     except FileNotFoundError:
-        st.error("❌ 人口動態データファイルが見つかりません: 人口動態/population_included/2024_population.csv")
+        st.error(f"❌ 人口動態データファイルが見つかりません: {POPULATION_PATH}")
     except Exception as e:
         st.error(f"❌ 人口動態データの読み込みエラー: {e}")
     
     # 年齢別人口データの読み込み
     age_data = {}
-    for year in [2022, 2023, 2024]:
+    for year in AGE_YEARS:
         try:
-            df = pd.read_csv(f"人口動態/prefecture_population_age/{year}_population_age.csv", 
-                           encoding='utf-8', skiprows=2)
-            age_data[year] = df
+            age_data[year] = read_table(AGE_PATH_TEMPLATE.format(year=year), read_age_csv)
             data_status["age"][year] = True
             st.success(f"✅ {year}年年齢別データを読み込みました")
         except FileNotFoundError:
@@ -82,66 +96,51 @@ def load_data():
     
     return population_2024, age_data, data_status
 
+@st.cache_data
+def get_clean_data():
+    """クリーニング済みデータの取得（再実行時はキャッシュを利用）"""
+    population_2024, age_data, data_status = load_data()
+    try:
+        pop_cleaned = clean_population_data(population_2024)
+    except Exception as e:
+        st.error(f"データクリーニングエラー: {e}")
+        pop_cleaned = None
+    return pop_cleaned, age_data, data_status
+
+@st.cache_data
 def create_sample_data():
-    """サンプルデータの作成（デモ用）"""
+    """サンプルデータの作成（デモ用、再実行時はキャッシュを利用）"""
     st.info("📝 サンプルデータを使用してデモンストレーションを行います")
     
     # サンプル都道府県データ
     prefectures = ['東京都', '神奈川県', '大阪府', '愛知県', '埼玉県', '千葉県', '兵庫県', '北海道', '福岡県', '静岡県']
+    n = len(prefectures)
+    rng = np.random.default_rng(0)
     
     sample_data = {
         '都道府県名': prefectures,
-        '総人口': np.random.randint(500000, 14000000, 10),
-        '人口増減率': np.random.uniform(-1.5, 1.0, 10),
-        '人口増減数': np.random.randint(-50000, 50000, 10),
-        '自然増減数': np.random.randint(-30000, 10000, 10),
-        '社会増減数': np.random.randint(-20000, 40000, 10),
-        '出生数': np.random.randint(5000, 100000, 10),
-        '死亡数': np.random.randint(10000, 150000, 10)
+        '総人口': rng.integers(500000, 14000000, size=n),
+        '人口増減率': rng.uniform(-1.5, 1.0, size=n),
+        '人口増減数': rng.integers(-50000, 50000, size=n),
+        '自然増減数': rng.integers(-30000, 10000, size=n),
+        '社会増減数': rng.integers(-20000, 40000, size=n),
+        '出生数': rng.integers(5000, 100000, size=n),
+        '死亡数': rng.integers(10000, 150000, size=n)
     }
     
     return pd.DataFrame(sample_data)
 
-def clean_population_data(df):
-    """人口動態データのクリーニング"""
-    if df is None:
-        return None
-    
-    try:
-        # 列名の設定
-        columns = ['団体コード', '都道府県名', '男性人口', '女性人口', '総人口', '世帯数',
-                  '転入国内', '転入国外', '転入計', '出生数', 'その他増', '増加計',
-                  '転出国内', '転出国外', '転出計', '死亡数', 'その他減', '減少計',
-                  '人口増減数', '人口増減率', '自然増減数', '自然増減率', '社会増減数', '社会増減率']
-        
-        # 列数を調整
-        if len(df.columns) >= len(columns):
-            df.columns = columns[:len(df.columns)]
-        
-        # 合計行を除外
-        df = df[df['都道府県名'] != '合計'].copy()
-        
-        # 数値列の変換
-        numeric_cols = ['男性人口', '女性人口', '総人口', '世帯数', '出生数', '死亡数',
-                       '人口増減数', '人口増減率', '自然増減数', '自然増減率', 
-                       '社会増減数', '社会増減率']
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '').str.replace(' ', ''), 
-                                      errors='coerce')
-        
-        return df
-    except Exception as e:
-        st.error(f"データクリーニングエラー: {e}")
-        return None
-
+@st.cache_data
 def create_basic_charts(df):
-    """基本的なチャートを作成（Plotlyなしでも動作）"""
+    """基本的なチャートを作成（Plotlyなしでも動作、同じ入力ではキャッシュを利用）"""
     if not PLOTLY_AVAILABLE:
         st.warning("Plotlyがインストールされていないため、基本的な表示のみ行います")
         return None
     
+    px = _get_px()
+    if px is None:
+        return None
+    
     # 人口増減率の棒グラフ
     fig = px.bar(
         df.head(10),
@@ -151,7 +150,7 @@ def create_basic_charts(df):
         color='人口増減率',
         color_continuous_scale='RdYlBu'
     )
-    fig.update_xaxis(tickangle=45)
+    fig.update_layout(xaxis_tickangle=-45)
     return fig
 
 def main():
@@ -168,7 +167,7 @@ def main():
     
     # データ読み込み
     with st.spinner('データを読み込んでいます...'):
-        pop_data, age_data, data_status = load_data()
+        pop_cleaned, age_data, data_status = get_clean_data()
     
     # データの状態確認
     st.sidebar.title("📋 データ状況")
@@ -178,76 +177,75 @@ def main():
         st.sidebar.write(f"**{year}年年齢別:**", "✅ 利用可能" if status else "❌ 未利用")
     
     # データがない場合はサンプルデータを使用
-    if pop_data is None:
+    if not data_status["population"]:
         st.warning("実際のデータが読み込めないため、サンプルデータを使用します")
         pop_cleaned = create_sample_data()
-    else:
-        pop_cleaned = clean_population_data(pop_data)
     
     if pop_cleaned is None:
         st.error("データの処理に失敗しました")
         st.stop()
     
     # メインダッシュボード
-    st.markdown('<div class="sub-header">📈 全国概況</div>', unsafe_allow_html=True)
+    sub_header("📈 全国概況")
     
-    # 主要指標
-    col1, col2, col3, col4 = st.columns(4)
+    # 主要指標（4指標を1回の集計で計算、列が無い指標は「データなし」と表示）
+    metrics = [
+        ("総人口", '総人口', 'sum', "{:,.0f}人"),
+        ("平均人口増減率", '人口増減率', 'mean', "{:.2f}%"),
+        ("自然増減（全国）", '自然増減数', 'sum', "{:,.0f}人"),
+        ("社会増減（全国）", '社会増減数', 'sum', "{:,.0f}人"),
+    ]
+    metric_aggs = {col: func for _, col, func, _ in metrics if col in pop_cleaned.columns}
+    stats = pop_cleaned.agg(metric_aggs) if metric_aggs else pd.Series(dtype='float64')
     
-    with col1:
-        total_pop = pop_cleaned['総人口'].sum()
-        st.metric("総人口", f"{total_pop:,.0f}人")
-    
-    with col2:
-        avg_change_rate = pop_cleaned['人口増減率'].mean()
-        st.metric("平均人口増減率", f"{avg_change_rate:.2f}%")
-    
-    with col3:
-        if '自然増減数' in pop_cleaned.columns:
-            natural_change = pop_cleaned['自然増減数'].sum()
-            st.metric("自然増減（全国）", f"{natural_change:,.0f}人")
-        else:
-            st.metric("自然増減（全国）", "データなし")
-    
-    with col4:
-        if '社会増減数' in pop_cleaned.columns:
-            social_change = pop_cleaned['社会増減数'].sum()
-            st.metric("社会増減（全国）", f"{social_change:,.0f}人")
-        else:
-            st.metric("社会増減（全国）", "データなし")
+    for metric_col, (label, col, _, fmt) in zip(st.columns(4), metrics):
+        with metric_col:
+            if col in stats:
+                st.metric(label, fmt.format(stats[col]))
+            else:
+                st.metric(label, "データなし")
     
     # 都道府県別ランキング
-    st.markdown('<div class="sub-header">🏆 都道府県別人口増減率ランキング</div>', unsafe_allow_html=True)
+    sub_header("🏆 都道府県別人口増減率ランキング")
+    
+    # 人口増減率の上位・下位10件の位置を計算
+    # 安定ソートで同率は元の行順を保つ（keep='first'と同じ順序）
+    # NaNは順位付けせず除外するため、有効値が10件未満なら表示件数も減る
+    rates = pop_cleaned['人口増減率'].to_numpy(dtype=np.float64, na_value=np.nan)
+    n_ranked = min(10, np.count_nonzero(~np.isnan(rates)))
+    top_idx = np.argsort(-rates, kind='stable')[:n_ranked]
+    bottom_idx = np.argsort(rates, kind='stable')[:n_ranked]
+    ranking_cols = ['都道府県名', '人口増減率', '人口増減数']
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📈 増加率TOP10")
-        top_10 = pop_cleaned.nlargest(10, '人口増減率')[['都道府県名', '人口増減率', '人口増減数']]
+        top_10 = pop_cleaned.iloc[top_idx][ranking_cols]
         st.dataframe(top_10, use_container_width=True)
     
     with col2:
         st.subheader("📉 減少率TOP10")
-        bottom_10 = pop_cleaned.nsmallest(10, '人口増減率')[['都道府県名', '人口増減率', '人口増減数']]
+        bottom_10 = pop_cleaned.iloc[bottom_idx][ranking_cols]
         st.dataframe(bottom_10, use_container_width=True)
     
     # チャート表示
     if PLOTLY_AVAILABLE:
-        st.markdown('<div class="sub-header">📊 可視化</div>', unsafe_allow_html=True)
-        chart = create_basic_charts(pop_cleaned.sort_values('人口増減率', ascending=False))
+        sub_header("📊 可視化")
+        chart = create_basic_charts(pop_cleaned.iloc[top_idx][['都道府県名', '人口増減率']])
         if chart:
             st.plotly_chart(chart, use_container_width=True)
     
     # データ表示
-    st.markdown('<div class="sub-header">📋 データテーブル</div>', unsafe_allow_html=True)
-    st.dataframe(pop_cleaned, use_container_width=True)
+    sub_header("📋 データテーブル")
+    st.dataframe(pop_cleaned[_DISPLAY_COLS], use_container_width=True)
     
     # フッター
     st.sidebar.markdown("---")
     st.sidebar.info("""
     **必要なパッケージ**
     ```bash
-    pip install streamlit plotly pandas numpy
+    pip install streamlit plotly pandas numpy pyarrow
     ```
     
     **データファイル構成**
@@ -260,6 +258,11 @@ def main():
         ├── 2023_population_age.csv
         └── 2024_population_age.csv
     ```
+    
+    **高速化（任意）**
+    ```bash
+    python convert_to_parquet.py
+    ```
     """)
 
 if __name__ == "__main__":